@@ -2,63 +2,393 @@
 import re
 import sys
 import argparse
+import concurrent.futures
+import functools
+import heapq
+import mmap
 import os
 import math
+from array import array
 from collections import defaultdict
-from decimal import Decimal, InvalidOperation
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 RETURN_SCORE_MODES = {"return", "returns", "normalized", "leverage_neutral"}
 DEFAULT_SCORE_MODE = "return"
 DEFAULT_RETURN_SCALE = 1000.0
 
+# NumPy vectorizes the O(N) statistics passes; fall back to scalar loops.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Numba JIT-compiles the per-trade PnL kernel; plain Python otherwise.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Prefer RE2's linear-time DFA engine for the hot loop; the pattern has no
+# backrefs/lookarounds, so it compiles unchanged. Fall back to stdlib re.
+try:
+    import re2 as _re_impl
+except ImportError:
+    _re_impl = re
+
+# Regex to capture timestamp and the rest of the message.
+# Compiled once at module scope (bytes mode; the log is scanned as bytes
+# and only the captured substrings are decoded).
+_LOG_RE = _re_impl.compile(
+    rb"^(?P<timestamp>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{4})\s+"
+    rb".*?\[(?P<type>ENTRY|EXIT)\]\s+"
+    rb"pair=(?P<pair>\S+)\s+"
+    rb"direction=(?P<direction>\S+)\s+"
+    rb"size_a=(?P<size_a>\S+)\s+"
+    rb"price_a=(?P<price_a>\S+)\s+"
+    rb"size_b=(?P<size_b>\S+)\s+"
+    rb"price_b=(?P<price_b>\S+)"
+    rb"(?:\s+.*?\s+ts=(?P<ts>\d+))?"
+    rb"(?:.*?\bpnl=(?P<pnl>[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?))?"
+    rb"(?:\s+.*)?$"
+)
+
+
+# Event type and direction codes: interned small-int compares in the hot
+# loop instead of repeated string equality checks.
+_TYPE_ENTRY = 0
+_TYPE_EXIT = 1
+_DIR_LONG_SPREAD = 0
+_DIR_SHORT_SPREAD = 1
+_DIR_OTHER = 2
+_DIRECTION_CODES = {b"LongSpread": _DIR_LONG_SPREAD, b"ShortSpread": _DIR_SHORT_SPREAD}
+
+
+def _detect_tag(line):
+    """Classify a line's trade tag (_TYPE_ENTRY/_TYPE_EXIT/None) in one scan.
+
+    Both tags share the literal prefix "[E", so one memchr-backed find() walk
+    plus a fixed-offset compare replaces two independent substring scans.
+    """
+    pos = line.find(b"[E")
+    while pos != -1:
+        tail = line[pos + 2 : pos + 7]
+        if tail.startswith(b"NTRY]"):
+            return _TYPE_ENTRY
+        if tail.startswith(b"XIT]"):
+            return _TYPE_EXIT
+        pos = line.find(b"[E", pos + 2)
+    return None
+
+
+def _pnl_kernel(
+    dir_code,
+    entry_pa,
+    entry_pb,
+    entry_sa,
+    entry_sb,
+    exit_pa,
+    exit_pb,
+    boundary,
+    exit_pnl,
+    use_exit,
+    cost_ratio,
+):
+    """Per-trade PnL over parallel arrays of closed trades.
+
+    Written as a scalar loop so Numba can compile it; runs under plain
+    NumPy/Python semantics otherwise.
+    """
+    n = dir_code.shape[0]
+    pnls = np.empty(n, dtype=np.float64)
+    returns = np.empty(n, dtype=np.float64)
+    total = 0.0
+    for i in range(n):
+        if use_exit[i]:
+            pnl = exit_pnl[i]
+        else:
+            if dir_code[i] == _DIR_LONG_SPREAD:
+                pnl = (exit_pa[i] - entry_pa[i]) * entry_sa[i] + (
+                    entry_pb[i] - exit_pb[i]
+                ) * entry_sb[i]
+            elif dir_code[i] == _DIR_SHORT_SPREAD:
+                pnl = (entry_pa[i] - exit_pa[i]) * entry_sa[i] + (
+                    exit_pb[i] - entry_pb[i]
+                ) * entry_sb[i]
+            else:
+                pnl = 0.0
+        if cost_ratio > 0.0:
+            entry_cost = 0.0
+            if not boundary[i]:
+                entry_cost = (
+                    entry_pa[i] * entry_sa[i] + entry_pb[i] * entry_sb[i]
+                ) * cost_ratio
+            exit_cost = (
+                exit_pa[i] * entry_sa[i] + exit_pb[i] * entry_sb[i]
+            ) * cost_ratio
+            pnl -= entry_cost + exit_cost
+        total += pnl
+        pnls[i] = pnl
+        notional = abs(entry_pa[i] * entry_sa[i]) + abs(entry_pb[i] * entry_sb[i])
+        returns[i] = pnl / notional if notional > 0.0 else 0.0
+    return pnls, returns, total
+
+
+if numba is not None and np is not None:
+    _pnl_kernel = numba.njit(cache=True)(_pnl_kernel)
+
+
+# Only a handful of distinct UTC offsets ever appear in one log file.
+_TZ_CACHE = {}
+
+
+def _tz_from_offset(offset):
+    tz = _TZ_CACHE.get(offset)
+    if tz is None:
+        if not offset or offset[0] not in "+-":
+            raise ValueError(f"bad UTC offset: {offset!r}")
+        delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+        tz = timezone(-delta if offset[0] == "-" else delta)
+        _TZ_CACHE[offset] = tz
+    return tz
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_ts(text):
+    """Fast fixed-format parser for 'YYYY-MM-DDTHH:MM:SS+ZZZZ' timestamps.
+
+    Cached per unique string: lines logged within the same second share the
+    same timestamp, so repeats are common. Raises ValueError on bad input,
+    like strptime.
+    """
+    return datetime(
+        int(text[0:4]),
+        int(text[5:7]),
+        int(text[8:10]),
+        int(text[11:13]),
+        int(text[14:16]),
+        int(text[17:19]),
+        tzinfo=_tz_from_offset(text[19:24]),
+    )
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_ts_unix(text):
+    """Unix seconds (int) for a 'YYYY-MM-DDTHH:MM:SS+ZZZZ' timestamp.
+
+    The scan only ever compares and subtracts timestamps, so they are kept
+    as plain ints: scalar compares instead of datetime rich comparison.
+    """
+    return int(_parse_ts(text).timestamp())
+
+
+class Trade:
+    """One parsed trade line.
+
+    __slots__ keeps the record at a fixed size and makes field access a
+    C-level slot load instead of a hashed dict lookup.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "type",
+        "pair",
+        "direction",
+        "size_a",
+        "price_a",
+        "size_b",
+        "price_b",
+        "pnl",
+    )
+
+    def __init__(
+        self, timestamp, type, pair, direction, size_a, price_a, size_b, price_b, pnl
+    ):
+        self.timestamp = timestamp
+        self.type = type
+        self.pair = pair
+        self.direction = direction
+        self.size_a = size_a
+        self.price_a = price_a
+        self.size_b = size_b
+        self.price_b = price_b
+        self.pnl = pnl
+
 
 def parse_log_line(line):
     """
-    Parses a single log line to extract timestamp and trade information.
+    Parses a single log line (as bytes) to extract timestamp and trade information.
     Expected log format: "YYYY-MM-DDTHH:MM:SS+ZZZZ [LEVEL] - [ENTRY/EXIT] ..."
     """
-    # Regex to capture timestamp and the rest of the message
-    log_pattern = re.compile(
-        r"^(?P<timestamp>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{4})\s+"
-        r".*?\[(?P<type>ENTRY|EXIT)\]\s+"
-        r"pair=(?P<pair>\S+)\s+"
-        r"direction=(?P<direction>\S+)\s+"
-        r"size_a=(?P<size_a>\S+)\s+"
-        r"price_a=(?P<price_a>\S+)\s+"
-        r"size_b=(?P<size_b>\S+)\s+"
-        r"price_b=(?P<price_b>\S+)"
-        r"(?:\s+.*?\s+ts=(?P<ts>\d+))?"
-        r"(?:\s+.*)?$"
-    )
-    match = log_pattern.search(line)
-    if not match:
+    # Literal prefilter: skips all parsing for the noise lines that make up
+    # most of a log.
+    line_type = _detect_tag(line)
+    if line_type is None:
         return None
 
-    data = match.groupdict()
+    parts = line.split()
+    if not parts:
+        return None
+    fields = {}
+    for tok in parts[1:]:
+        if b"=" in tok:
+            key, _, value = tok.partition(b"=")
+            fields[key] = value
 
-    # Convert timestamp string to datetime object (fallback when ts is absent).
-    ts_str = data["timestamp"]
-    data["timestamp"] = datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S%z")
-    if data.get("ts"):
-        data["timestamp"] = datetime.fromtimestamp(
-            int(data["ts"]), tz=timezone.utc
+    try:
+        timestamp = _parse_ts_unix(parts[0].decode("ascii"))
+        ts_raw = fields.get(b"ts")
+        if ts_raw:
+            timestamp = int(ts_raw)
+        pnl = None
+        pnl_raw = fields.get(b"pnl")
+        if pnl_raw:
+            try:
+                pnl = float(pnl_raw)
+            except ValueError:
+                pnl = None
+        # Numeric fields stay native floats; the score output is float anyway
+        # and float arithmetic is far cheaper than Decimal in the hot loop.
+        return Trade(
+            timestamp,
+            line_type,
+            fields[b"pair"].decode("utf-8", errors="ignore"),
+            _DIRECTION_CODES.get(fields[b"direction"], _DIR_OTHER),
+            float(fields[b"size_a"]),
+            float(fields[b"price_a"]),
+            float(fields[b"size_b"]),
+            float(fields[b"price_b"]),
+            pnl,
         )
+    except (KeyError, ValueError, UnicodeDecodeError):
+        return _parse_log_line_regex(line)
 
-    # Convert numeric fields to Decimal for precision
-    for key in ["size_a", "price_a", "size_b", "price_b"]:
-        data[key] = Decimal(data[key])
 
-    pnl_match = re.search(r"\bpnl=(?P<pnl>[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)", line)
-    if pnl_match:
-        try:
-            data["pnl"] = Decimal(pnl_match.group("pnl"))
-        except InvalidOperation:
-            data["pnl"] = None
+def _parse_log_line_regex(line):
+    """Regex fallback for trade lines the fast tokenizer cannot handle."""
+    match = _LOG_RE.search(line)
+    if not match:
+        return None
+
+    # Positional unpack: one groups() call instead of a groupdict allocation
+    # plus per-field name lookups.
+    (
+        ts_raw,
+        type_raw,
+        pair_raw,
+        direction_raw,
+        size_a_raw,
+        price_a_raw,
+        size_b_raw,
+        price_b_raw,
+        unix_ts_raw,
+        pnl_raw,
+    ) = match.groups()
+
+    if unix_ts_raw:
+        timestamp = int(unix_ts_raw)
     else:
-        data["pnl"] = None
+        timestamp = _parse_ts_unix(ts_raw.decode("ascii"))
+
+    pnl = None
+    if pnl_raw:
+        try:
+            pnl = float(pnl_raw)
+        except ValueError:
+            pnl = None
+
+    return Trade(
+        timestamp,
+        _TYPE_ENTRY if type_raw == b"ENTRY" else _TYPE_EXIT,
+        pair_raw.decode("utf-8", errors="ignore"),
+        _DIRECTION_CODES.get(direction_raw, _DIR_OTHER),
+        float(size_a_raw),
+        float(price_a_raw),
+        float(size_b_raw),
+        float(price_b_raw),
+        pnl,
+    )
+
+
+# Files below this size are parsed serially; the fork/pickle overhead of a
+# process pool only pays off on multi-chunk logs.
+_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+_PARALLEL_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _parse_chunk(path, lo, hi):
+    """Parse the trade lines whose start offset falls in [lo, hi).
+
+    Boundaries snap to newlines: a line straddling lo belongs to the previous
+    chunk, a line straddling hi is finished by this one, so every line is
+    parsed exactly once.
+    """
+    trades = []
+    with open(path, "rb") as f:
+        if lo > 0:
+            f.seek(lo - 1)
+            f.readline()
+        while f.tell() < hi:
+            line = f.readline()
+            if not line:
+                break
+            if _detect_tag(line) is None:
+                continue
+            trade = parse_log_line(line)
+            if trade is not None:
+                trades.append(trade)
+    return trades
+
+
+def _iter_trades(log_file):
+    """Yield parsed trades from log_file in file order.
+
+    The parse+filter stage is embarrassingly parallel, so large files are
+    split into newline-aligned chunks parsed across a process pool; the
+    stateful ENTRY/EXIT reconciliation stays in the caller. Small files are
+    scanned serially.
+    """
+    size = os.path.getsize(log_file)
+    workers = parse_env_int("LOG_ANALYZER_WORKERS")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if size >= _PARALLEL_MIN_BYTES and workers > 1:
+        bounds = list(range(0, size, _PARALLEL_CHUNK_BYTES)) + [size]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_parse_chunk, log_file, lo, hi)
+                for lo, hi in zip(bounds, bounds[1:])
+            ]
+            # Futures are consumed in submit order, preserving file order.
+            for future in futures:
+                yield from future.result()
+        return
+
+    with open(log_file, "rb") as f:
+        for line in _iter_log_lines(f):
+            # Literal prefilter: noise lines skip even the parse_log_line
+            # call overhead.
+            if _detect_tag(line) is None:
+                continue
+            trade = parse_log_line(line)
+            if trade is not None:
+                yield trade
+
 
-    return data
+def _iter_log_lines(f):
+    """Yield raw bytes lines, via mmap when the file supports it.
+
+    mmap avoids per-line read buffering and universal-newline translation;
+    empty files and mmap-less streams fall back to plain iteration.
+    """
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        yield from f
+        return
+    try:
+        yield from iter(mm.readline, b"")
+    finally:
+        mm.close()
 
 
 def calculate_pnl(
@@ -67,164 +397,244 @@ def calculate_pnl(
     """
     Calculates the total Profit and Loss from a log file, optionally starting from a specific time.
     """
-    open_positions = {}
-    last_seen_prices = {}
-    total_pnl = Decimal("0.0")
-    trade_pnls = []
-    trade_returns = []
+    # Structure-of-arrays state, indexed by a per-pair slot assigned on first
+    # sight: avoids allocating a nested dict per ENTRY/EXIT event.
+    pair_slots = {}
+    last_price_a = array("d")
+    last_price_b = array("d")
+    last_ts = []
+    open_mask = []
+    open_seq = array("q")
+    open_dir = array("b")
+    open_price_a = array("d")
+    open_price_b = array("d")
+    open_size_a = array("d")
+    open_size_b = array("d")
+    open_ts = []
+    open_boundary = []
+    entry_seq = 0
+
+    def pair_slot(pair):
+        slot = pair_slots.get(pair)
+        if slot is None:
+            slot = len(pair_slots)
+            pair_slots[pair] = slot
+            last_price_a.append(0.0)
+            last_price_b.append(0.0)
+            last_ts.append(None)
+            open_mask.append(False)
+            open_seq.append(0)
+            open_dir.append(_DIR_OTHER)
+            open_price_a.append(0.0)
+            open_price_b.append(0.0)
+            open_size_a.append(0.0)
+            open_size_b.append(0.0)
+            open_ts.append(None)
+            open_boundary.append(False)
+        return slot
+
+    def mark_entry(slot, trade_data, ts):
+        nonlocal entry_seq
+        entry_seq += 1
+        open_mask[slot] = True
+        open_seq[slot] = entry_seq
+        open_dir[slot] = trade_data.direction
+        open_price_a[slot] = trade_data.price_a
+        open_price_b[slot] = trade_data.price_b
+        open_size_a[slot] = trade_data.size_a
+        open_size_b[slot] = trade_data.size_b
+        open_ts[slot] = ts
+        open_boundary[slot] = False
+
+    closed_trades = []
     hold_secs = []
-    window_started = start_time is None
+    # Timestamps are compared as int unix seconds throughout the scan;
+    # convert the window bounds once up front.
+    start_unix = None if start_time is None else int(start_time.timestamp())
+    end_unix = None if end_time is None else int(end_time.timestamp())
+    window_started = start_unix is None
     end_reached = False
     fee_bps = max(0.0, fee_bps or 0.0)
     slippage_bps = max(0.0, slippage_bps or 0.0)
     cost_bps = fee_bps + slippage_bps
-    cost_ratio = (
-        Decimal(str(cost_bps)) / Decimal("10000") if cost_bps > 0.0 else Decimal("0.0")
-    )
+    cost_ratio = cost_bps / 10000.0 if cost_bps > 0.0 else 0.0
 
     def close_position(
-        entry, exit_price_a, exit_price_b, exit_ts, exit_pnl=None, use_exit_pnl=False
+        slot, exit_price_a, exit_price_b, exit_ts, exit_pnl=None, use_exit_pnl=False
     ):
-        nonlocal total_pnl
-        if use_exit_pnl and exit_pnl is not None:
-            trade_pnl = exit_pnl
-        else:
-            if entry["direction"] == "LongSpread":
-                pnl_a = (exit_price_a - entry["price_a"]) * entry["size_a"]
-                pnl_b = (entry["price_b"] - exit_price_b) * entry["size_b"]
-            elif entry["direction"] == "ShortSpread":
-                pnl_a = (entry["price_a"] - exit_price_a) * entry["size_a"]
-                pnl_b = (exit_price_b - entry["price_b"]) * entry["size_b"]
-            else:
-                pnl_a = pnl_b = Decimal("0.0")
-            trade_pnl = pnl_a + pnl_b
-
-        if cost_ratio > Decimal("0.0"):
-            entry_cost = Decimal("0.0")
-            if not entry.get("boundary_marked", False):
-                entry_cost = (
-                    (entry["price_a"] * entry["size_a"])
-                    + (entry["price_b"] * entry["size_b"])
-                ) * cost_ratio
-            exit_cost = (
-                (exit_price_a * entry["size_a"]) + (exit_price_b * entry["size_b"])
-            ) * cost_ratio
-            trade_pnl -= entry_cost + exit_cost
-
-        total_pnl += trade_pnl
-        trade_pnls.append(float(trade_pnl))
-        notional = abs(entry["price_a"] * entry["size_a"]) + abs(
-            entry["price_b"] * entry["size_b"]
-        )
-        trade_return = 0.0
-        if notional > Decimal("0.0"):
-            try:
-                trade_return = float(trade_pnl / notional)
-            except (InvalidOperation, ZeroDivisionError, OverflowError):
-                trade_return = 0.0
-        trade_returns.append(trade_return)
-        if entry.get("timestamp") and exit_ts:
-            hold_secs.append(
-                max(0.0, (exit_ts - entry["timestamp"]).total_seconds())
+        # Stage the closed trade; the arithmetic runs in _pnl_kernel afterwards.
+        use_pnl = use_exit_pnl and exit_pnl is not None
+        closed_trades.append(
+            (
+                open_dir[slot],
+                open_price_a[slot],
+                open_price_b[slot],
+                open_size_a[slot],
+                open_size_b[slot],
+                exit_price_a,
+                exit_price_b,
+                open_boundary[slot],
+                exit_pnl if use_pnl else 0.0,
+                use_pnl,
             )
+        )
+        entry_ts = open_ts[slot]
+        if entry_ts is not None and exit_ts is not None:
+            hold_secs.append(float(max(0, exit_ts - entry_ts)))
         else:
             hold_secs.append(0.0)
 
     def close_open_positions(boundary_ts=None):
-        for pair, entry in list(open_positions.items()):
-            prices = last_seen_prices.get(pair)
-            if not prices:
+        # Close in entry order, matching the old insertion-ordered dict walk.
+        slots = sorted(
+            (slot for slot in range(len(open_mask)) if open_mask[slot]),
+            key=lambda slot: open_seq[slot],
+        )
+        for slot in slots:
+            open_mask[slot] = False
+            if last_ts[slot] is None:
                 continue
-            exit_ts = boundary_ts or prices.get("timestamp") or entry.get("timestamp")
+            exit_ts = boundary_ts if boundary_ts is not None else last_ts[slot]
+            if exit_ts is None:
+                exit_ts = open_ts[slot]
             close_position(
-                entry,
-                prices["price_a"],
-                prices["price_b"],
+                slot,
+                last_price_a[slot],
+                last_price_b[slot],
                 exit_ts,
                 exit_pnl=None,
                 use_exit_pnl=False,
             )
-        open_positions.clear()
 
     try:
-        with open(log_file, "r") as f:
-            for line in f:
-                trade_data = parse_log_line(line)
-                if not trade_data:
-                    continue
-
-                ts = trade_data["timestamp"]
-                pair = trade_data["pair"]
-
-                # Before the window: keep state and last seen prices.
-                if start_time and ts < start_time:
-                    last_seen_prices[pair] = {
-                        "price_a": trade_data["price_a"],
-                        "price_b": trade_data["price_b"],
-                        "timestamp": ts,
-                    }
-                    if trade_data["type"] == "ENTRY":
-                        trade_data["boundary_marked"] = False
-                        open_positions[pair] = trade_data
-                    elif trade_data["type"] == "EXIT":
-                        if pair in open_positions:
-                            open_positions.pop(pair)
-                    continue
-
-                if start_time and not window_started:
-                    window_started = True
-                    for open_pair, entry in open_positions.items():
-                        entry["boundary_marked"] = True
-                        prices = last_seen_prices.get(open_pair)
-                        if prices:
-                            entry["price_a"] = prices["price_a"]
-                            entry["price_b"] = prices["price_b"]
-                        entry["timestamp"] = start_time
-
-                if end_time and window_started and ts > end_time:
-                    close_open_positions(end_time)
-                    end_reached = True
-                    break
-
-                last_seen_prices[pair] = {
-                    "price_a": trade_data["price_a"],
-                    "price_b": trade_data["price_b"],
-                    "timestamp": ts,
-                }
-
-                if trade_data["type"] == "ENTRY":
-                    trade_data["boundary_marked"] = False
-                    open_positions[pair] = trade_data
-
-                elif trade_data["type"] == "EXIT":
-                    entry = open_positions.pop(pair, None)
-                    if entry:
-                        use_exit_pnl = (
-                            trade_data.get("pnl") is not None
-                            and not entry.get("boundary_marked", False)
-                        )
-                        close_position(
-                            entry,
-                            trade_data["price_a"],
-                            trade_data["price_b"],
-                            ts,
-                            exit_pnl=trade_data.get("pnl"),
-                            use_exit_pnl=use_exit_pnl,
-                        )
+        for trade_data in _iter_trades(log_file):
+            # Bind hot fields to locals once; the loop is interpreter-bound
+            # and repeated dict subscripts add up.
+            ts = trade_data.timestamp
+            line_type = trade_data.type
+            price_a = trade_data.price_a
+            price_b = trade_data.price_b
+            slot = pair_slot(trade_data.pair)
+
+            # Before the window: keep state and last seen prices.
+            if start_unix is not None and ts < start_unix:
+                last_price_a[slot] = price_a
+                last_price_b[slot] = price_b
+                last_ts[slot] = ts
+                if line_type == _TYPE_ENTRY:
+                    mark_entry(slot, trade_data, ts)
+                elif line_type == _TYPE_EXIT:
+                    open_mask[slot] = False
+                continue
+
+            if start_unix is not None and not window_started:
+                window_started = True
+                for open_slot in range(len(open_mask)):
+                    if not open_mask[open_slot]:
+                        continue
+                    open_boundary[open_slot] = True
+                    if last_ts[open_slot] is not None:
+                        open_price_a[open_slot] = last_price_a[open_slot]
+                        open_price_b[open_slot] = last_price_b[open_slot]
+                    open_ts[open_slot] = start_unix
+
+            if end_unix is not None and window_started and ts > end_unix:
+                close_open_positions(end_unix)
+                end_reached = True
+                break
+
+            last_price_a[slot] = price_a
+            last_price_b[slot] = price_b
+            last_ts[slot] = ts
+
+            if line_type == _TYPE_ENTRY:
+                mark_entry(slot, trade_data, ts)
+
+            elif line_type == _TYPE_EXIT:
+                if open_mask[slot]:
+                    open_mask[slot] = False
+                    pnl_val = trade_data.pnl
+                    close_position(
+                        slot,
+                        price_a,
+                        price_b,
+                        ts,
+                        exit_pnl=pnl_val,
+                        use_exit_pnl=pnl_val is not None
+                        and not open_boundary[slot],
+                    )
 
         if window_started:
-            if end_time and not end_reached:
-                close_open_positions(end_time)
-            elif not end_time:
+            if end_unix is not None and not end_reached:
+                close_open_positions(end_unix)
+            elif end_unix is None:
                 close_open_positions()
 
     except FileNotFoundError:
         print(f"[log_analyzer] File not found: {log_file}", file=sys.stderr)
-        return Decimal("0.0"), [], [], []
+        return 0.0, [], [], []
     except Exception as exc:
         # On any other error, assume PnL is zero to not halt the optimizer
         print(f"[log_analyzer] Error while parsing {log_file}: {exc}", file=sys.stderr)
-        return Decimal("0.0"), [], [], []
+        return 0.0, [], [], []
+
+    if not closed_trades:
+        return 0.0, [], [], hold_secs
+
+    if np is not None:
+        cols = list(zip(*closed_trades))
+        pnls, returns, total_pnl = _pnl_kernel(
+            np.asarray(cols[0], dtype=np.int64),
+            np.asarray(cols[1], dtype=np.float64),
+            np.asarray(cols[2], dtype=np.float64),
+            np.asarray(cols[3], dtype=np.float64),
+            np.asarray(cols[4], dtype=np.float64),
+            np.asarray(cols[5], dtype=np.float64),
+            np.asarray(cols[6], dtype=np.float64),
+            np.asarray(cols[7], dtype=np.bool_),
+            np.asarray(cols[8], dtype=np.float64),
+            np.asarray(cols[9], dtype=np.bool_),
+            cost_ratio,
+        )
+        return float(total_pnl), pnls.tolist(), returns.tolist(), hold_secs
+
+    trade_pnls = []
+    trade_returns = []
+    total_pnl = 0.0
+    for (
+        dir_code,
+        entry_pa,
+        entry_pb,
+        entry_sa,
+        entry_sb,
+        exit_pa,
+        exit_pb,
+        boundary,
+        exit_pnl,
+        use_pnl,
+    ) in closed_trades:
+        if use_pnl:
+            trade_pnl = exit_pnl
+        elif dir_code == _DIR_LONG_SPREAD:
+            trade_pnl = (exit_pa - entry_pa) * entry_sa + (
+                entry_pb - exit_pb
+            ) * entry_sb
+        elif dir_code == _DIR_SHORT_SPREAD:
+            trade_pnl = (entry_pa - exit_pa) * entry_sa + (
+                exit_pb - entry_pb
+            ) * entry_sb
+        else:
+            trade_pnl = 0.0
+        if cost_ratio > 0.0:
+            entry_cost = 0.0
+            if not boundary:
+                entry_cost = (entry_pa * entry_sa + entry_pb * entry_sb) * cost_ratio
+            exit_cost = (exit_pa * entry_sa + exit_pb * entry_sb) * cost_ratio
+            trade_pnl -= entry_cost + exit_cost
+        total_pnl += trade_pnl
+        trade_pnls.append(trade_pnl)
+        notional = abs(entry_pa * entry_sa) + abs(entry_pb * entry_sb)
+        trade_returns.append(trade_pnl / notional if notional > 0.0 else 0.0)
 
     return total_pnl, trade_pnls, trade_returns, hold_secs
 
@@ -249,7 +659,65 @@ def parse_env_float(name):
         return None
 
 
+def _score_stats_kernel(arr, k):
+    """Drawdown, Sharpe and k-worst CVaR in one pass over the trade array.
+
+    Same scalar-loop shape as _pnl_kernel so Numba compiles it; the three
+    stats otherwise each cost their own array passes.
+    """
+    n = arr.shape[0]
+    peak = 0.0
+    cumulative = 0.0
+    max_dd = 0.0
+    total = 0.0
+    for i in range(n):
+        cumulative += arr[i]
+        total += arr[i]
+        if cumulative > peak:
+            peak = cumulative
+        drawdown = peak - cumulative
+        if drawdown > max_dd:
+            max_dd = drawdown
+    sharpe = 0.0
+    if n >= 2:
+        mean = total / n
+        sq = 0.0
+        for i in range(n):
+            diff = arr[i] - mean
+            sq += diff * diff
+        variance = sq / (n - 1)
+        if variance > 0:
+            sharpe = (mean / math.sqrt(variance)) * math.sqrt(n)
+    cvar = 0.0
+    if 0 < k <= n:
+        worst = np.sort(arr)[:k]
+        cvar = worst.sum() / k
+    return max_dd, sharpe, cvar
+
+
+if numba is not None and np is not None:
+    _score_stats_kernel = numba.njit(cache=True)(_score_stats_kernel)
+
+
+def compute_score_stats(series, k):
+    """(max_drawdown, sharpe, cvar) for a trade PnL/return series."""
+    if np is not None and series:
+        arr = np.asarray(series, dtype=np.float64)
+        return _score_stats_kernel(arr, k)
+    return (
+        compute_max_drawdown(series),
+        compute_sharpe(series),
+        compute_cvar(series, k) if series and 0 < k <= len(series) else 0.0,
+    )
+
+
 def compute_max_drawdown(trade_pnls):
+    if np is not None:
+        if not trade_pnls:
+            return 0.0
+        cumulative = np.cumsum(np.asarray(trade_pnls, dtype=np.float64))
+        peak = np.maximum.accumulate(np.maximum(cumulative, 0.0))
+        return float(np.max(peak - cumulative, initial=0.0))
     peak = 0.0
     cumulative = 0.0
     max_dd = 0.0
@@ -267,6 +735,12 @@ def compute_sharpe(trade_pnls):
     n = len(trade_pnls)
     if n < 2:
         return 0.0
+    if np is not None:
+        arr = np.asarray(trade_pnls, dtype=np.float64)
+        std = float(arr.std(ddof=1))
+        if std <= 0:
+            return 0.0
+        return (float(arr.mean()) / std) * math.sqrt(n)
     mean = sum(trade_pnls) / n
     variance = sum((p - mean) ** 2 for p in trade_pnls) / (n - 1)
     if variance <= 0:
@@ -274,6 +748,15 @@ def compute_sharpe(trade_pnls):
     return (mean / math.sqrt(variance)) * math.sqrt(n)
 
 
+def compute_cvar(series, k):
+    """Mean of the k worst values in series (k >= 1)."""
+    if np is not None:
+        worst = np.partition(np.asarray(series, dtype=np.float64), k - 1)[:k]
+        return float(worst.mean())
+    worst = heapq.nsmallest(k, series)
+    return sum(worst) / len(worst)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze bot logs to calculate PnL.")
     parser.add_argument("log_file", help="Path to the log file.")
@@ -295,10 +778,7 @@ if __name__ == "__main__":
     start_time_obj = None
     if args.start_timestamp:
         try:
-            # The timezone format is already handled by %z
-            start_time_obj = datetime.strptime(
-                args.start_timestamp, "%Y-%m-%dT%H:%M:%S%z"
-            )
+            start_time_obj = _parse_ts(args.start_timestamp)
         except ValueError:
             sys.exit(
                 f"Error: Invalid start-timestamp format. Use 'YYYY-MM-DDTHH:MM:SS+ZZZZ'."
@@ -307,9 +787,7 @@ if __name__ == "__main__":
     end_time_obj = None
     if args.end_timestamp:
         try:
-            end_time_obj = datetime.strptime(
-                args.end_timestamp, "%Y-%m-%dT%H:%M:%S%z"
-            )
+            end_time_obj = _parse_ts(args.end_timestamp)
         except ValueError:
             sys.exit(
                 "Error: Invalid end-timestamp format. Use 'YYYY-MM-DDTHH:MM:SS+ZZZZ'."
@@ -337,19 +815,18 @@ if __name__ == "__main__":
         score = float(final_pnl)
 
     trade_count = len(series)
-    max_drawdown = compute_max_drawdown(series)
-    sharpe = compute_sharpe(series)
-    avg_hold_secs = sum(hold_secs) / len(hold_secs) if hold_secs else 0.0
-    worst_trade = min(series) if series else 0.0
     cvar_pct = parse_env_float("OPTIMIZER_CVAR_PCT") or 0.05
     cvar_penalty = parse_env_float("OPTIMIZER_CVAR_PENALTY") or 0.0
-    cvar = 0.0
-    if series and cvar_pct > 0.0:
-        k = max(1, int(math.ceil(len(series) * cvar_pct)))
-        worst = sorted(series)[:k]
-        cvar = sum(worst) / len(worst)
-        if cvar > 0.0:
-            cvar = 0.0
+    cvar_k = (
+        max(1, int(math.ceil(trade_count * cvar_pct)))
+        if series and cvar_pct > 0.0
+        else 0
+    )
+    max_drawdown, sharpe, cvar = compute_score_stats(series, cvar_k)
+    if cvar > 0.0:
+        cvar = 0.0
+    avg_hold_secs = sum(hold_secs) / len(hold_secs) if hold_secs else 0.0
+    worst_trade = min(series) if series else 0.0
 
     min_trades = parse_env_int("OPTIMIZER_MIN_TRADES") or 0
     max_dd = parse_env_float("OPTIMIZER_MAX_DRAWDOWN")